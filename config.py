@@ -23,7 +23,7 @@ class Settings(BaseSettings):
     
     # Retry configuration
     max_retries: int = 5
-    retry_delays: list[int] = [1, 2, 4, 8, 16]
+    retry_delays: tuple[int, ...] = (1, 2, 4, 8, 16)
     
     # GitHub Pages wait timeout (seconds)
     pages_timeout: int = 300
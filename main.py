@@ -1,20 +1,22 @@
 """FastAPI application for receiving and processing task requests."""
+import asyncio
 import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
-import uvicorn
+from functools import lru_cache
+from typing import TYPE_CHECKING
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
+from fastapi.responses import ORJSONResponse
+import msgspec
 
 from config import get_settings
-from models import (
-    TaskRequest,
-    TaskResponse,
-    EvaluationNotification,
-    HealthResponse
-)
-from services.llm_generator import LLMGenerator
-from services.github_service import GitHubService
-from services.notifier import NotificationService
+from models import TaskRequest, TaskRequestMsg, EvaluationNotification
+
+# Service modules pull in heavy SDKs (openai, PyGithub, httpx); they are
+# imported on first use so startup and /health don't pay for them
+if TYPE_CHECKING:
+    from services.llm_generator import LLMGenerator
+    from services.github_service import GitHubService
+    from services.notifier import NotificationService
 
 # Configure logging
 logging.basicConfig(
@@ -26,6 +28,68 @@ logger = logging.getLogger(__name__)
 # Get settings
 settings = get_settings()
 
+# Task IDs may contain "." and "_", which we map to "-" for repo names
+_REPO_NAME_TABLE = str.maketrans({".": "-", "_": "-"})
+
+# Request bodies are decoded with msgspec, which is much faster than Pydantic.
+# strict=False keeps Pydantic's lax coercions (e.g. "round": "2" -> 2).
+_TASK_DECODER = msgspec.json.Decoder(TaskRequestMsg, strict=False)
+
+
+def _inline_refs(schema: dict) -> dict:
+    """Inline "$defs" references so a model schema can be embedded in OpenAPI."""
+    defs = schema.pop("$defs", {})
+    
+    def resolve(node):
+        if isinstance(node, dict):
+            if "$ref" in node:
+                return resolve(defs[node["$ref"].rsplit("/", 1)[-1]])
+            return {key: resolve(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [resolve(item) for item in node]
+        return node
+    
+    return resolve(schema)
+
+
+@lru_cache(maxsize=1)
+def get_llm_generator() -> "LLMGenerator":
+    """Get cached LLM generator instance."""
+    from services.llm_generator import LLMGenerator
+    
+    settings = get_settings()
+    return LLMGenerator(
+        api_key=settings.openai_api_key,
+        model=settings.openai_model,
+        base_url=settings.openai_base_url
+    )
+
+
+@lru_cache(maxsize=1)
+def get_github_service() -> "GitHubService":
+    """Get cached GitHub service instance."""
+    from services.github_service import GitHubService
+    
+    settings = get_settings()
+    return GitHubService(
+        token=settings.github_token,
+        username=settings.github_username,
+        pages_timeout=settings.pages_timeout,
+        retry_delays=settings.retry_delays
+    )
+
+
+@lru_cache(maxsize=1)
+def get_notifier() -> "NotificationService":
+    """Get cached notification service instance."""
+    from services.notifier import NotificationService
+    
+    settings = get_settings()
+    return NotificationService(
+        max_retries=settings.max_retries,
+        retry_delays=settings.retry_delays
+    )
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -35,6 +99,11 @@ async def lifespan(app: FastAPI):
     logger.info(f"GitHub username: {settings.github_username}")
     yield
     logger.info("Shutting down application...")
+    # Only close services that were actually created
+    if get_github_service.cache_info().currsize:
+        await get_github_service().aclose()
+    if get_notifier.cache_info().currsize:
+        await get_notifier().aclose()
 
 
 # Create FastAPI app
@@ -42,27 +111,32 @@ app = FastAPI(
     title="LLM Code Deployment - Student API",
     description="Receives task briefs, generates apps, and deploys to GitHub Pages",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 
-@app.get("/", response_model=HealthResponse)
-async def root():
+# Responses below are small fixed-shape dicts we build ourselves, so they are
+# returned without a response_model to skip FastAPI's serialize/re-validate
+# step. The tradeoff: their shape is no longer checked or shown in the OpenAPI
+# schema, so keep them in sync with HealthResponse/TaskResponse in models.py.
+@app.get("/", response_model=None)
+async def root() -> dict:
     """Root endpoint."""
-    return HealthResponse(status="healthy")
+    return {"status": "healthy", "version": "1.0.0"}
 
 
-@app.get("/health", response_model=HealthResponse)
-async def health_check():
+@app.get("/health", response_model=None)
+async def health_check() -> dict:
     """Health check endpoint."""
-    return HealthResponse(status="healthy")
+    return {"status": "healthy", "version": "1.0.0"}
 
 
-@app.post("/api/build", response_model=TaskResponse)
+@app.post("/api/build", response_model=None)
 async def build_and_deploy(
-    request: TaskRequest,
+    raw_request: Request,
     background_tasks: BackgroundTasks
-):
+) -> dict:
     """
     Receive task request and trigger build/deploy process.
     
@@ -71,6 +145,15 @@ async def build_and_deploy(
     2. Returns immediate 200 response
     3. Processes task in background
     """
+    try:
+        request = _TASK_DECODER.decode(await raw_request.body()).to_model()
+    except msgspec.DecodeError as e:
+        # Same shape as FastAPI's own validation errors
+        raise HTTPException(
+            status_code=422,
+            detail=[{"type": "value_error", "loc": ["body"], "msg": str(e)}]
+        )
+    
     logger.info(f"Received task request: {request.task} (round {request.round})")
     
     # Validate email
@@ -89,37 +172,51 @@ async def build_and_deploy(
     )
     
     # Return immediate response
-    return TaskResponse(
-        status="accepted",
-        message=f"Task {request.task} received and processing started"
-    )
+    return {
+        "status": "accepted",
+        "message": f"Task {request.task} received and processing started"
+    }
+
+
+_default_openapi = app.openapi
+
+
+def _openapi() -> dict:
+    """Build the OpenAPI schema, adding the raw /api/build request body.
+    
+    /api/build reads the raw body, so FastAPI can't infer its schema. It is
+    added here, on first access, rather than at import so the deferred
+    TaskRequest schema isn't built on the cold-start path.
+    """
+    if app.openapi_schema is None:
+        schema = _default_openapi()
+        schema["paths"]["/api/build"]["post"]["requestBody"] = {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": _inline_refs(TaskRequest.model_json_schema())
+                }
+            }
+        }
+    return app.openapi_schema
+
+
+app.openapi = _openapi
 
 
 async def process_task(request: TaskRequest):
     try:
         logger.info(f"Processing task: {request.task}")
         
-        # Initialize services
-        generator = LLMGenerator(
-            api_key=settings.openai_api_key,
-            model=settings.openai_model,
-            base_url=settings.openai_base_url
-        )
-        
-        github_service = GitHubService(
-            token=settings.github_token,
-            username=settings.github_username,
-            pages_timeout=settings.pages_timeout
-        )
-        
-        notifier = NotificationService(
-            max_retries=settings.max_retries,
-            retry_delays=settings.retry_delays
-        )
+        # Get services (constructed once per process)
+        generator = get_llm_generator()
+        github_service = get_github_service()
+        notifier = get_notifier()
         
         # Step 1: Generate application
         logger.info("Step 1: Generating application with LLM...")
-        files = generator.generate_app(
+        files = await asyncio.to_thread(
+            generator.generate_app,
             brief=request.brief,
             checks=request.checks,
             attachments=request.attachments or [],
@@ -128,25 +225,27 @@ async def process_task(request: TaskRequest):
         )
         
         # Step 2: Create/update repository
-        repo_name = request.task.replace(".", "-").replace("_", "-")
+        repo_name = request.task.translate(_REPO_NAME_TABLE)
         
         if request.round == 1:
             logger.info("Step 2: Creating new GitHub repository...")
-            deployment = github_service.create_and_deploy(
+            deployment = await github_service.create_and_deploy(
                 repo_name=repo_name,
                 files=files,
                 task_id=request.task
             )
         else:
             logger.info("Step 2: Updating existing repository...")
-            deployment = github_service.update_repository(
+            deployment = await github_service.update_repository(
                 repo_name=repo_name,
                 files=files
             )
         
         # Step 3: Notify evaluation server
         logger.info("Step 3: Notifying evaluation server...")
-        notification = EvaluationNotification(
+        # Values are already validated (request) or produced by us (deployment),
+        # so skip re-validation
+        notification = EvaluationNotification.model_construct(
             email=request.email,
             task=request.task,
             round=request.round,
@@ -174,7 +273,7 @@ async def process_task(request: TaskRequest):
 async def global_exception_handler(request, exc):
     """Global exception handler."""
     logger.error(f"Unhandled exception: {exc}", exc_info=True)
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"detail": "Internal server error"}
     )
@@ -182,6 +281,8 @@ async def global_exception_handler(request, exc):
 
 def main():
     """Run the application."""
+    import uvicorn
+    
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
@@ -1,16 +1,25 @@
-"""Pydantic models for request/response validation."""
-from pydantic import BaseModel, Field
-from typing import List, Optional
+"""Pydantic models for request/response validation.
+
+Schemas are built lazily (``defer_build``) on first use to keep import cheap.
+The request body itself is decoded with the msgspec structs at the bottom.
+"""
+import msgspec
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Annotated, List, Optional
 
 
 class Attachment(BaseModel):
     """File attachment with data URI."""
+    model_config = ConfigDict(defer_build=True)
+
     name: str
     url: str  # data:mime/type;base64,... format
 
 
 class TaskRequest(BaseModel):
     """Incoming task request from IITM server."""
+    model_config = ConfigDict(defer_build=True)
+
     email: str
     secret: str
     task: str
@@ -24,12 +33,17 @@ class TaskRequest(BaseModel):
 
 class TaskResponse(BaseModel):
     """Response sent back immediately."""
+    model_config = ConfigDict(defer_build=True)
+
     status: str
     message: str
 
 
 class EvaluationNotification(BaseModel):
     """Notification sent to evaluation server."""
+    # Frozen: built once and then only serialized (and made hashable for caching)
+    model_config = ConfigDict(defer_build=True, frozen=True)
+
     email: str
     task: str
     round: int
@@ -41,5 +55,43 @@ class EvaluationNotification(BaseModel):
 
 class HealthResponse(BaseModel):
     """Health check response."""
+    model_config = ConfigDict(defer_build=True)
+
     status: str
-    version: str = "1.0.0"
\ No newline at end of file
+    version: str = "1.0.0"
+
+
+class AttachmentMsg(msgspec.Struct):
+    """File attachment as decoded from the request body."""
+    name: str
+    url: str
+
+
+class TaskRequestMsg(msgspec.Struct):
+    """Incoming task request, decoded and validated by msgspec."""
+    email: str
+    secret: str
+    task: str
+    round: Annotated[int, msgspec.Meta(ge=1)]
+    nonce: str
+    brief: str
+    checks: List[str]
+    evaluation_url: str
+    attachments: Optional[List[AttachmentMsg]] = None
+    
+    def to_model(self) -> TaskRequest:
+        """Convert to a TaskRequest without re-running validation."""
+        return TaskRequest.model_construct(
+            email=self.email,
+            secret=self.secret,
+            task=self.task,
+            round=self.round,
+            nonce=self.nonce,
+            brief=self.brief,
+            checks=self.checks,
+            evaluation_url=self.evaluation_url,
+            attachments=[
+                Attachment.model_construct(name=att.name, url=att.url)
+                for att in self.attachments or []
+            ]
+        )
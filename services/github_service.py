@@ -1,8 +1,13 @@
 """GitHub repository creation and Pages deployment."""
+import asyncio
+import base64
+import itertools
 import logging
+import threading
 import time
-from typing import Dict
-from github import Github, GithubException
+from functools import cached_property
+from typing import Awaitable, Callable, Dict, Sequence
+from github import Github, GithubException, InputGitTreeElement
 import httpx
 
 logger = logging.getLogger(__name__)
@@ -11,14 +16,46 @@ logger = logging.getLogger(__name__)
 class GitHubService:
     """Handle GitHub repository operations and Pages deployment."""
     
-    def __init__(self, token: str, username: str, pages_timeout: int = 300):
+    def __init__(
+        self,
+        token: str,
+        username: str,
+        pages_timeout: int = 300,
+        retry_delays: Sequence[int] = None
+    ):
         """Initialize GitHub client."""
         self.github = Github(token)
+        # PyGithub's Requester (shared by every object it returns) isn't
+        # thread-safe, and this service is shared by concurrent tasks
+        self._github_lock = threading.Lock()
+        self._token = token
         self.username = username
-        self.user = self.github.get_user()
         self.pages_timeout = pages_timeout
+        self.retry_delays = retry_delays or (1, 2, 4, 8, 16)
+        # Shared HTTP client so Pages calls reuse pooled connections
+        self._http = httpx.AsyncClient(
+            timeout=10.0,
+            headers={"User-Agent": "tds-deploy/1.0"}
+        )
+    
+    async def aclose(self):
+        """Close the shared HTTP client."""
+        await self._http.aclose()
+    
+    async def _call_github(self, fn: Callable, *args):
+        """Run a blocking PyGithub call in a worker thread, one at a time."""
+        def locked():
+            with self._github_lock:
+                return fn(*args)
+        
+        return await asyncio.to_thread(locked)
+    
+    @cached_property
+    def user(self):
+        """Authenticated GitHub user (fetched on first use)."""
+        return self.github.get_user()
     
-    def create_and_deploy(
+    async def create_and_deploy(
         self,
         repo_name: str,
         files: Dict[str, str],
@@ -38,24 +75,27 @@ class GitHubService:
         logger.info(f"Creating repository: {repo_name}")
         
         try:
+            # Blocking PyGithub calls run in a worker thread to keep the loop free
             # Create repository
-            repo = self.user.create_repo(
-                name=repo_name,
-                description=f"Auto-generated application: {task_id}",
-                private=False,
-                auto_init=False
+            repo = await self._call_github(
+                lambda: self.user.create_repo(
+                    name=repo_name,
+                    description=f"Auto-generated application: {task_id}",
+                    private=False,
+                    auto_init=True  # Git Data API needs an initialized branch
+                )
             )
             
             logger.info(f"Repository created: {repo.html_url}")
             
             # Upload files
-            commit_sha = self._upload_files(repo, files)
+            commit_sha = await self._upload_files(repo, files)
             
             # Enable GitHub Pages
-            pages_url = self._enable_pages(repo)
+            pages_url = await self._enable_pages(repo)
             
             # Wait for Pages to be ready
-            self._wait_for_pages(pages_url)
+            await self._wait_for_pages(pages_url)
             
             return {
                 "repo_url": repo.html_url,
@@ -67,7 +107,7 @@ class GitHubService:
             logger.error(f"GitHub API error: {e}")
             raise
     
-    def update_repository(
+    async def update_repository(
         self,
         repo_name: str,
         files: Dict[str, str]
@@ -86,18 +126,20 @@ class GitHubService:
         
         try:
             # Get existing repository
-            repo = self.user.get_repo(repo_name)
+            repo = await self._call_github(lambda: self.user.get_repo(repo_name))
             
             # Upload/update files
-            commit_sha = self._upload_files(repo, files, "Update application (Round 2)")
+            commit_sha = await self._upload_files(
+                repo, files, "Update application (Round 2)"
+            )
             
             # Pages should already be enabled
             pages_url = f"https://{self.username}.github.io/{repo_name}/"
             
-            # Wait for Pages to rebuild
+            # The old deployment keeps serving 200s, so probing the site can't
+            # tell when the new commit is live; wait for its Pages build instead
             logger.info("Waiting for Pages to rebuild...")
-            time.sleep(15)
-            self._wait_for_pages(pages_url)
+            await self._wait_for_pages_build(repo_name, commit_sha)
             
             return {
                 "repo_url": repo.html_url,
@@ -108,17 +150,17 @@ class GitHubService:
         except GithubException as e:
             if e.status == 404:
                 logger.warning("Repository not found, creating new one")
-                return self.create_and_deploy(repo_name, files, repo_name)
+                return await self.create_and_deploy(repo_name, files, repo_name)
             else:
                 raise
     
-    def _upload_files(
+    async def _upload_files(
         self,
         repo,
         files: Dict[str, str],
         commit_message: str = "Initial commit"
     ) -> str:
-        """Upload files to repository."""
+        """Upload files to repository as a single commit (Git Data API)."""
         logger.info(f"Uploading {len(files)} files...")
         
         # Determine branch name
@@ -127,48 +169,70 @@ class GitHubService:
         except:
             default_branch = "main"
         
-        # Upload each file
-        for filename, content in files.items():
-            try:
-                # Check if file exists
-                try:
-                    existing = repo.get_contents(filename, ref=default_branch)
-                    
-                    # Update existing file
-                    repo.update_file(
-                        path=existing.path,
-                        message=commit_message,
-                        content=content if isinstance(content, (str, bytes)) else str(content),
-                        sha=existing.sha,
-                        branch=default_branch
-                    )
-                    logger.info(f"  Updated: {filename}")
-                    
-                except GithubException as e:
-                    if e.status == 404:
-                        # Create new file
-                        repo.create_file(
-                            path=filename,
-                            message=commit_message,
-                            content=content if isinstance(content, (str, bytes)) else str(content),
-                            branch=default_branch
-                        )
-                        logger.info(f"  Created: {filename}")
-                    else:
-                        raise
-                        
-            except Exception as e:
-                logger.error(f"Error uploading {filename}: {e}")
-                raise
+        ref, parent = await self._call_github(
+            self._get_branch_head, repo, default_branch
+        )
+        
+        # Upload blobs concurrently on the async client. PyGithub's Requester
+        # isn't safe to share across threads, so blobs don't go through it.
+        sem = asyncio.Semaphore(8)
+        blob_shas = await asyncio.gather(*(
+            self._create_blob(repo, filename, content, sem)
+            for filename, content in files.items()
+        ))
         
-        # Get latest commit SHA
-        commits = repo.get_commits(sha=default_branch)
-        commit_sha = commits[0].sha
+        elements = [
+            InputGitTreeElement(path=filename, mode="100644", type="blob", sha=sha)
+            for filename, sha in zip(files, blob_shas)
+        ]
+        commit_sha = await self._call_github(
+            self._commit_tree, repo, ref, parent, elements, commit_message
+        )
         
         logger.info(f"Commit SHA: {commit_sha}")
         return commit_sha
     
-    def _enable_pages(self, repo) -> str:
+    def _get_branch_head(self, repo, branch: str):
+        """Return (ref, commit) for the tip of a branch."""
+        ref = repo.get_git_ref(f"heads/{branch}")
+        return ref, repo.get_git_commit(ref.object.sha)
+    
+    def _commit_tree(self, repo, ref, parent, elements, commit_message: str) -> str:
+        """Commit tree elements on top of parent and move ref to it."""
+        tree = repo.create_git_tree(elements, base_tree=parent.tree)
+        commit = repo.create_git_commit(commit_message, tree, [parent])
+        ref.edit(commit.sha)
+        return commit.sha
+    
+    async def _create_blob(self, repo, filename: str, content, sem: asyncio.Semaphore) -> str:
+        """Create a Git blob for a single file and return its SHA."""
+        if isinstance(content, bytes):
+            data = {"content": base64.b64encode(content).decode(), "encoding": "base64"}
+        else:
+            data = {"content": str(content), "encoding": "utf-8"}
+        
+        url = f"https://api.github.com/repos/{repo.full_name}/git/blobs"
+        try:
+            async with sem:
+                response = await self._http.post(
+                    url, json=data, headers=self._api_headers(), timeout=60.0
+                )
+            response.raise_for_status()
+            logger.info(f"  Uploaded: {filename}")
+            return response.json()["sha"]
+        except Exception as e:
+            logger.error(f"Error uploading {filename}: {e}")
+            raise
+    
+    def _api_headers(self) -> Dict[str, str]:
+        """Headers for direct GitHub REST API calls."""
+        return {
+            "Authorization": f"Bearer {self._token}",
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28"
+        }
+    
+    async def _enable_pages(self, repo) -> str:
         """Enable GitHub Pages for the repository."""
         logger.info("Enabling GitHub Pages...")
         
@@ -181,10 +245,7 @@ class GitHubService:
         # Use GitHub REST API directly (PyGithub has limited Pages support)
         try:
             url = f"https://api.github.com/repos/{self.username}/{repo.name}/pages"
-            headers = {
-                "Authorization": f"token {self.github._Github__requester._Requester__auth.token}",
-                "Accept": "application/vnd.github.v3+json"
-            }
+            headers = self._api_headers()
             data = {
                 "source": {
                     "branch": branch,
@@ -192,44 +253,86 @@ class GitHubService:
                 }
             }
             
-            with httpx.Client() as client:
-                response = client.post(url, json=data, headers=headers)
+            response = await self._http.post(url, json=data, headers=headers)
+            
+            if response.status_code in [201, 409]:  # 201=created, 409=already exists
+                pages_url = f"https://{self.username}.github.io/{repo.name}/"
+                logger.info(f"GitHub Pages enabled: {pages_url}")
+                return pages_url
+            else:
+                logger.warning(f"Pages API response {response.status_code}: {response.text}")
+                # Return expected URL anyway
+                return f"https://{self.username}.github.io/{repo.name}/"
                 
-                if response.status_code in [201, 409]:  # 201=created, 409=already exists
-                    pages_url = f"https://{self.username}.github.io/{repo.name}/"
-                    logger.info(f"GitHub Pages enabled: {pages_url}")
-                    return pages_url
-                else:
-                    logger.warning(f"Pages API response {response.status_code}: {response.text}")
-                    # Return expected URL anyway
-                    return f"https://{self.username}.github.io/{repo.name}/"
-                    
         except Exception as e:
             logger.error(f"Error enabling Pages: {e}")
             # Return expected URL
             return f"https://{self.username}.github.io/{repo.name}/"
     
-    def _wait_for_pages(self, pages_url: str):
-        """Wait for GitHub Pages to become available."""
-        logger.info(f"Waiting for Pages to be ready: {pages_url}")
+    async def _poll(self, check: Callable[[], Awaitable[bool]]) -> bool:
+        """
+        Call check until it returns True or pages_timeout runs out.
         
+        Backs off through retry_delays, then every 30s.
+        
+        Returns:
+            True if check succeeded, False on timeout
+        """
         start_time = time.time()
+        delays = itertools.chain(self.retry_delays, itertools.repeat(30))
         
-        while time.time() - start_time < self.pages_timeout:
+        for delay in delays:
             try:
-                with httpx.Client(timeout=10.0) as client:
-                    response = client.get(pages_url)
-                    
-                    if response.status_code == 200:
-                        logger.info(f"✓ GitHub Pages is live!")
-                        return
-                        
+                if await check():
+                    return True
             except Exception as e:
                 logger.debug(f"Pages not ready yet: {e}")
             
-            time.sleep(10)
+            remaining = self.pages_timeout - (time.time() - start_time)
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(delay, remaining))
         
         logger.warning(
             f"Timeout waiting for Pages (waited {self.pages_timeout}s). "
             f"It may still be deploying..."
-        )
\ No newline at end of file
+        )
+        return False
+    
+    async def _wait_for_pages(self, pages_url: str):
+        """Wait for GitHub Pages to become available."""
+        logger.info(f"Waiting for Pages to be ready: {pages_url}")
+        
+        async def is_live() -> bool:
+            # HEAD avoids transferring the page body
+            response = await self._http.head(pages_url, follow_redirects=True)
+            return 200 <= response.status_code < 400
+        
+        if await self._poll(is_live):
+            logger.info(f"✓ GitHub Pages is live!")
+    
+    async def _wait_for_pages_build(self, repo_name: str, commit_sha: str):
+        """Wait for GitHub Pages to finish building the given commit."""
+        logger.info(f"Waiting for Pages build of commit {commit_sha[:7]}")
+        url = f"https://api.github.com/repos/{self.username}/{repo_name}/pages/builds/latest"
+        
+        async def is_built() -> bool:
+            response = await self._http.get(url, headers=self._api_headers())
+            if response.status_code != 200:
+                return False
+            
+            build = response.json()
+            if build.get("commit") != commit_sha:
+                return False  # Build for the new commit not started yet
+            
+            if build.get("status") == "errored":
+                error = (build.get("error") or {}).get("message")
+                logger.warning(f"Pages build failed: {error}")
+                return True  # Nothing more to wait for
+            
+            if build.get("status") == "built":
+                logger.info("✓ GitHub Pages build finished")
+                return True
+            return False
+        
+        await self._poll(is_built)
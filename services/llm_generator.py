@@ -1,14 +1,110 @@
 """LLM-powered application generator using OpenAI."""
 import logging
 import base64
-import json
-from datetime import datetime
-from openai import OpenAI
-from typing import Dict, List
+import io
+import re
+from datetime import datetime, timezone
+import orjson
+from typing import Dict, List, Tuple
 from models import Attachment
 
 logger = logging.getLogger(__name__)
 
+# Fallback patterns for extracting code from markdown responses
+_HTML_BLOCK_RE = re.compile(r"```html\n(.*?)```", re.DOTALL)
+_CSS_BLOCK_RE = re.compile(r"```css\n(.*?)```", re.DOTALL)
+_JS_BLOCK_RE = re.compile(r"```(?:javascript|js)\n(.*?)```", re.DOTALL)
+_HTML_DOC_RE = re.compile(r"<!DOCTYPE html>.*?</html>", re.DOTALL | re.IGNORECASE)
+
+_MIT_LICENSE_TEMPLATE = """MIT License
+
+Copyright (c) {year} Student Project
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+_README_TEMPLATE = """# {task_id}
+
+## Project Summary
+
+{brief}
+
+**Generated:** {generated_at} UTC
+
+## Files
+
+{file_list}
+
+## Setup Instructions
+
+1. Clone this repository:
+   ```bash
+   git clone <repository-url>
+   cd {task_id}
+   ```
+
+2. Open in browser:
+   - Simply open `index.html` in your web browser
+   - Or use a local server:
+     ```bash
+     python -m http.server 8000
+     # Visit http://localhost:8000
+     ```
+
+## Usage
+
+Open the application in a modern web browser. The app will automatically handle the requirements as specified in the project brief.
+
+## Code Explanation
+
+### Main Components
+
+- **index.html**: Main application interface and structure
+- **style.css**: Styling and layout (if separate file)
+- **script.js**: Application logic and interactivity (if separate file)
+
+The application is built using standard web technologies (HTML5, CSS3, JavaScript) and may include external libraries loaded via CDN for additional functionality.
+
+### Key Features
+
+The application implements all requirements specified in the brief, with proper error handling and user-friendly interface design.
+
+## Technical Details
+
+- Pure client-side application (no backend required)
+- External libraries loaded from CDN (no build process needed)
+- Responsive design for various screen sizes
+- Modern browser required (Chrome, Firefox, Safari, Edge)
+
+## License
+
+This project is licensed under the MIT License - see the LICENSE file for details.
+
+## Deployment
+
+This application is deployed on GitHub Pages at the repository's Pages URL.
+"""
+
+# License year is fixed at import; a process rarely outlives a year boundary
+_LICENSE_YEAR = datetime.now(timezone.utc).year
+_MIT_LICENSE = _MIT_LICENSE_TEMPLATE.format(year=_LICENSE_YEAR)
+
 
 class LLMGenerator:
     """Generate web applications using LLM assistance."""
@@ -19,6 +115,9 @@ class LLMGenerator:
         This explicitly logs which endpoint is being used and ensures the
         base_url is passed to the OpenAI client when using AI Pipe.
         """
+        # Imported here: the SDK is large and only needed once a client is built
+        from openai import OpenAI
+        
         # Store model early for use elsewhere
         self.model = model
 
@@ -72,8 +171,11 @@ class LLMGenerator:
         logger.info(f"Generating app for task: {task_id} (round {round_num})")
         logger.info(f"Brief: {brief[:100]}...")
         
+        # Decode attachments once; shared by the prompt and the output files
+        decoded = self._decode_attachments(attachments)
+        
         # Build comprehensive prompt
-        prompt = self._build_prompt(brief, checks, attachments, task_id, round_num)
+        prompt = self._build_prompt(brief, checks, attachments, decoded, task_id, round_num)
         
         # Call LLM
         logger.info("Calling OpenAI API...")
@@ -94,7 +196,7 @@ class LLMGenerator:
         )
         
         # Parse generated code
-        files = self._parse_response(response.choices[0].message.content, attachments)
+        files = self._parse_response(response.choices[0].message.content, decoded)
         
         # Add required files
         files["LICENSE"] = self._generate_mit_license()
@@ -138,58 +240,83 @@ IMPORTANT: Return ONLY the JSON object, no other text."""
         brief: str,
         checks: List[str],
         attachments: List[Attachment],
+        decoded: Dict[str, Tuple[str, bool, bytes]],
         task_id: str,
         round_num: int
     ) -> str:
         """Build the user prompt with all context."""
-        parts = [
-            f"**Task ID:** {task_id}",
-            f"**Round:** {round_num}",
-            f"\n**Brief:**\n{brief}",
-        ]
+        buf = io.StringIO()
+        buf.write(f"**Task ID:** {task_id}\n")
+        buf.write(f"**Round:** {round_num}\n")
+        buf.write(f"\n**Brief:**\n{brief}\n")
         
         if checks:
-            parts.append("\n**Validation Checks (your app must pass these):**")
+            buf.write("\n**Validation Checks (your app must pass these):**\n")
             for i, check in enumerate(checks, 1):
-                parts.append(f"{i}. {check}")
+                buf.write(f"{i}. {check}\n")
         
         if attachments:
-            parts.append("\n**Attachments:**")
+            buf.write("\n**Attachments:**\n")
             for att in attachments:
-                # Decode and preview attachment content
-                if att.url.startswith("data:"):
-                    try:
-                        parts.append(self._decode_attachment_preview(att))
-                    except Exception as e:
-                        logger.warning(f"Could not decode {att.name}: {e}")
-                        parts.append(f"\n**{att.name}:** [Binary data]")
+                # Preview decoded attachment content
+                if att.name in decoded:
+                    buf.write(self._decode_attachment_preview(att, decoded[att.name]))
+                    buf.write("\n")
+                elif att.url.startswith("data:"):
+                    buf.write(f"\n**{att.name}:** [Binary data]\n")
         
-        parts.append("\n**Generate the complete web application now.**")
+        buf.write("\n**Generate the complete web application now.**")
         
-        return "\n".join(parts)
+        return buf.getvalue()
     
-    def _decode_attachment_preview(self, attachment: Attachment) -> str:
-        """Decode attachment and create preview for LLM context."""
-        header, encoded = attachment.url.split(",", 1)
-        content_type = header.split(";")[0].replace("data:", "")
+    def _decode_attachments(
+        self,
+        attachments: List[Attachment]
+    ) -> Dict[str, Tuple[str, bool, bytes]]:
+        """Decode data-URI attachments into {name: (content_type, is_base64, content)}."""
+        decoded = {}
         
-        if "base64" in header:
-            decoded = base64.b64decode(encoded)
-            
-            # If it's text-based, show preview
-            if any(t in content_type for t in ["text", "json", "csv", "xml"]):
-                text = decoded.decode("utf-8", errors="ignore")
-                preview = text[:1000] if len(text) > 1000 else text
+        for att in attachments:
+            if att.url.startswith("data:"):
+                try:
+                    header, encoded = att.url.split(",", 1)
+                    content_type = header.split(";")[0].replace("data:", "")
+                    
+                    if "base64" in header:
+                        decoded[att.name] = (
+                            content_type, True, base64.b64decode(encoded, validate=False)
+                        )
+                    else:
+                        decoded[att.name] = (content_type, False, encoded.encode())
+                except Exception as e:
+                    logger.warning(f"Could not decode {att.name}: {e}")
+        
+        return decoded
+    
+    def _decode_attachment_preview(
+        self,
+        attachment: Attachment,
+        decoded: Tuple[str, bool, bytes]
+    ) -> str:
+        """Create preview of a decoded attachment for LLM context."""
+        content_type, is_base64, content = decoded
+        
+        if is_base64:
+            # If it's text-based, show preview (UTF-8 is at most 4 bytes/char,
+            # so only the first 4000 bytes are needed for 1000 chars)
+            if any(t in content_type for t in ("text", "json", "csv", "xml")):
+                preview = content[:4000].decode("utf-8", errors="ignore")[:1000]
                 return f"\n**{attachment.name}** ({content_type}):\n```\n{preview}\n```"
             else:
-                return f"\n**{attachment.name}** ({content_type}): [Binary data, {len(decoded)} bytes]"
+                return f"\n**{attachment.name}** ({content_type}): [Binary data, {len(content)} bytes]"
         else:
-            return f"\n**{attachment.name}** ({content_type}):\n```\n{encoded[:500]}\n```"
+            preview = content[:500].decode("utf-8", errors="ignore")
+            return f"\n**{attachment.name}** ({content_type}):\n```\n{preview}\n```"
     
     def _parse_response(
         self,
         response_text: str,
-        attachments: List[Attachment]
+        decoded: Dict[str, Tuple[str, bool, bytes]]
     ) -> Dict[str, str]:
         """Parse LLM response and extract files."""
         files = {}
@@ -201,7 +328,7 @@ IMPORTANT: Return ONLY the JSON object, no other text."""
             
             if start >= 0 and end > start:
                 json_str = response_text[start:end]
-                data = json.loads(json_str)
+                data = orjson.loads(json_str)
                 
                 if "files" in data:
                     files = data["files"]
@@ -210,54 +337,39 @@ IMPORTANT: Return ONLY the JSON object, no other text."""
             else:
                 raise ValueError("No JSON found in response")
                 
-        except (json.JSONDecodeError, ValueError) as e:
+        except (orjson.JSONDecodeError, ValueError) as e:
             logger.warning(f"Could not parse JSON response: {e}")
             # Fallback: try to extract code blocks
             files = self._extract_code_blocks(response_text)
         
         # Save attachments as files (they might be referenced in the code)
-        for att in attachments:
-            if att.url.startswith("data:"):
-                try:
-                    header, encoded = att.url.split(",", 1)
-                    if "base64" in header:
-                        content = base64.b64decode(encoded)
-                    else:
-                        content = encoded.encode()
-                    
-                    files[att.name] = content
-                except Exception as e:
-                    logger.error(f"Error processing attachment {att.name}: {e}")
+        for name, (_, _, content) in decoded.items():
+            files[name] = content
         
         return files
     
     def _extract_code_blocks(self, text: str) -> Dict[str, str]:
         """Fallback: extract code from markdown blocks."""
-        import re
         files = {}
         
         # Try to find HTML
-        html_match = re.search(r"```html\n(.*?)```", text, re.DOTALL)
+        html_match = _HTML_BLOCK_RE.search(text)
         if html_match:
             files["index.html"] = html_match.group(1).strip()
         
         # Try to find CSS
-        css_match = re.search(r"```css\n(.*?)```", text, re.DOTALL)
+        css_match = _CSS_BLOCK_RE.search(text)
         if css_match:
             files["style.css"] = css_match.group(1).strip()
         
         # Try to find JavaScript
-        js_match = re.search(r"```(?:javascript|js)\n(.*?)```", text, re.DOTALL)
+        js_match = _JS_BLOCK_RE.search(text)
         if js_match:
             files["script.js"] = js_match.group(1).strip()
         
         # If no structured blocks, look for any HTML
         if not files:
-            html_match = re.search(
-                r"<!DOCTYPE html>.*?</html>",
-                text,
-                re.DOTALL | re.IGNORECASE
-            )
+            html_match = _HTML_DOC_RE.search(text)
             if html_match:
                 files["index.html"] = html_match.group(0)
         
@@ -265,29 +377,7 @@ IMPORTANT: Return ONLY the JSON object, no other text."""
     
     def _generate_mit_license(self) -> str:
         """Generate MIT License text."""
-        year = datetime.now().year
-        return f"""MIT License
-
-Copyright (c) {year} Student Project
-
-Permission is hereby granted, free of charge, to any person obtaining a copy
-of this software and associated documentation files (the "Software"), to deal
-in the Software without restriction, including without limitation the rights
-to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
-copies of the Software, and to permit persons to whom the Software is
-furnished to do so, subject to the following conditions:
-
-The above copyright notice and this permission notice shall be included in all
-copies or substantial portions of the Software.
-
-THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
-IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
-FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
-AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
-LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
-OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
-SOFTWARE.
-"""
+        return _MIT_LICENSE
     
     def _generate_readme(
         self,
@@ -296,69 +386,14 @@ SOFTWARE.
         files: Dict[str, str]
     ) -> str:
         """Generate comprehensive README."""
-        file_list = "\n".join([
-            f"- `{name}`" for name in sorted(files.keys())
+        file_list = "\n".join(
+            f"- `{name}`" for name in sorted(files)
             if name != "README.md"
-        ])
+        )
         
-        return f"""# {task_id}
-
-## Project Summary
-
-{brief}
-
-**Generated:** {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC
-
-## Files
-
-{file_list}
-
-## Setup Instructions
-
-1. Clone this repository:
-   ```bash
-   git clone <repository-url>
-   cd {task_id}
-   ```
-
-2. Open in browser:
-   - Simply open `index.html` in your web browser
-   - Or use a local server:
-     ```bash
-     python -m http.server 8000
-     # Visit http://localhost:8000
-     ```
-
-## Usage
-
-Open the application in a modern web browser. The app will automatically handle the requirements as specified in the project brief.
-
-## Code Explanation
-
-### Main Components
-
-- **index.html**: Main application interface and structure
-- **style.css**: Styling and layout (if separate file)
-- **script.js**: Application logic and interactivity (if separate file)
-
-The application is built using standard web technologies (HTML5, CSS3, JavaScript) and may include external libraries loaded via CDN for additional functionality.
-
-### Key Features
-
-The application implements all requirements specified in the brief, with proper error handling and user-friendly interface design.
-
-## Technical Details
-
-- Pure client-side application (no backend required)
-- External libraries loaded from CDN (no build process needed)
-- Responsive design for various screen sizes
-- Modern browser required (Chrome, Firefox, Safari, Edge)
-
-## License
-
-This project is licensed under the MIT License - see the LICENSE file for details.
-
-## Deployment
-
-This application is deployed on GitHub Pages at the repository's Pages URL.
-"""
\ No newline at end of file
+        return _README_TEMPLATE.format(
+            task_id=task_id,
+            brief=brief,
+            generated_at=datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+            file_list=file_list
+        )
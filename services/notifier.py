@@ -1,20 +1,130 @@
 """Notification service to send results to evaluation server."""
+import asyncio
 import logging
+import random
 import time
-from typing import List
+import weakref
+from typing import Dict, List, Optional, Sequence, Tuple
 import httpx
+import orjson
 from models import EvaluationNotification
 
 logger = logging.getLogger(__name__)
 
+# 4xx responses worth retrying; all other 4xx are treated as permanent
+_RETRIABLE_CLIENT_ERRORS = frozenset({408, 429})
+
+# Circuit breaker states
+_CLOSED = "closed"
+_OPEN = "open"
+_HALF_OPEN = "half_open"
+
+
+class _Circuit:
+    """Circuit breaker state for one evaluation server host."""
+    
+    def __init__(self):
+        self.state = _CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+
+
+# Serialized bodies per notification; EvaluationNotification is frozen, so
+# it is hashable and its bytes can't go stale
+_BODY_CACHE: "weakref.WeakKeyDictionary[EvaluationNotification, bytes]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _body_bytes(notification: EvaluationNotification) -> bytes:
+    """Serialize a notification to JSON bytes, once per instance."""
+    body = _BODY_CACHE.get(notification)
+    if body is None:
+        body = notification.model_dump_json().encode()
+        _BODY_CACHE[notification] = body
+    return body
+
 
 class NotificationService:
     """Handle notifications to evaluation server with retry logic."""
     
-    def __init__(self, max_retries: int = 5, retry_delays: List[int] = None):
-        """Initialize with retry configuration."""
+    def __init__(
+        self,
+        max_retries: int = 5,
+        retry_delays: Sequence[int] = None,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        max_concurrency: int = 50,
+        breaker_threshold: int = 3,
+        breaker_cooldown: float = 60.0,
+        total_budget_s: float = 45.0
+    ):
+        """Initialize with retry configuration.
+        
+        retry_delays gives the backoff ceiling per attempt; past its end the
+        ceiling grows as base_delay * 2**attempt. Either way it is capped at
+        max_delay. At most max_concurrency POSTs are in flight at once.
+        
+        After breaker_threshold consecutive failed sends to a host, that host's
+        circuit opens and sends to it fail fast for breaker_cooldown seconds;
+        then a single one-attempt probe decides whether to close it again.
+        
+        A single send never takes longer than total_budget_s, however slow
+        the remote is: attempts stop (and the last one is cut short) when the
+        budget runs out, even if max_retries is not reached.
+        """
         self.max_retries = max_retries
-        self.retry_delays = retry_delays or [1, 2, 4, 8, 16]
+        self.retry_delays = retry_delays or (1, 2, 4, 8, 16)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._client: httpx.AsyncClient | None = None
+        self._sem = asyncio.Semaphore(max_concurrency)
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self._circuits: Dict[str, _Circuit] = {}
+        self._breaker_lock = asyncio.Lock()
+        self.total_budget_s = total_budget_s
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the pooled HTTP client, creating it on first use."""
+        if self._client is None:
+            # The transport retries failed connects (DNS, refused) right away;
+            # the backoff loop is left for HTTP-level failures
+            transport = httpx.AsyncHTTPTransport(
+                retries=3,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                http2=True
+            )
+            self._client = httpx.AsyncClient(timeout=30.0, transport=transport)
+        return self._client
+    
+    def _backoff_delay(self, attempt: int) -> float:
+        """Full-jitter backoff: uniform in [0, ceiling] to spread out retries."""
+        if attempt < len(self.retry_delays):
+            ceiling = self.retry_delays[attempt]
+        else:
+            ceiling = self.base_delay * (2 ** attempt)
+        return random.uniform(0, min(self.max_delay, ceiling))
+    
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> float:
+        """Seconds requested by a Retry-After header (0 if absent or a date)."""
+        try:
+            return max(0.0, float(response.headers.get("Retry-After", 0)))
+        except ValueError:
+            return 0.0
+    
+    async def aclose(self):
+        """Close the pooled HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     async def notify_evaluation_server(
         self,
@@ -31,40 +141,267 @@ class NotificationService:
         Returns:
             True if successful, False otherwise
         """
-        payload = notification.model_dump()
+        # Serialize once; every attempt (and re-send) reuses the same bytes
+        body = _body_bytes(notification)
+        return await self._send(evaluation_url, body)
+    
+    async def _send(self, url: str, body: bytes) -> bool:
+        """POST a pre-serialized JSON body, guarded by the host's circuit breaker."""
+        # Each task has its own evaluation_url, so one failing evaluator must
+        # not block notifications to the others
+        host = httpx.URL(url).host
+        
+        async with self._breaker_lock:
+            circuit = self._circuits.setdefault(host, _Circuit())
+            if circuit.state == _OPEN:
+                if time.monotonic() - circuit.opened_at < self.breaker_cooldown:
+                    logger.warning("Circuit open; skipping notification to %s", url)
+                    return False
+                circuit.state = _HALF_OPEN
+                probing = True
+            elif circuit.state == _HALF_OPEN:
+                logger.warning("Circuit half-open; probe in flight, skipping %s", url)
+                return False
+            else:
+                probing = False
+        
+        try:
+            success, reachable = await self._post_with_retries(
+                url, body, 1 if probing else self.max_retries
+            )
+        except BaseException:
+            # A bug (or cancellation) says nothing about the remote's health;
+            # just release the probe slot so the next send can probe again
+            if probing:
+                async with self._breaker_lock:
+                    circuit.state = _OPEN
+            raise
+        
+        await self._record_outcome(circuit, reachable)
+        return success
+    
+    async def _record_outcome(self, circuit: _Circuit, reachable: bool):
+        """Update a host's circuit breaker state after a send."""
+        async with self._breaker_lock:
+            if reachable:
+                circuit.consecutive_failures = 0
+                circuit.state = _CLOSED
+                return
+            
+            circuit.consecutive_failures += 1
+            if (
+                circuit.state == _HALF_OPEN
+                or circuit.consecutive_failures >= self.breaker_threshold
+            ):
+                if circuit.state != _OPEN:
+                    logger.error(
+                        "Opening circuit after %d consecutive failures",
+                        circuit.consecutive_failures
+                    )
+                circuit.state = _OPEN
+                circuit.opened_at = time.monotonic()
+    
+    async def _post_with_retries(
+        self,
+        url: str,
+        body: bytes,
+        max_attempts: int
+    ) -> Tuple[bool, bool]:
+        """
+        POST body, retrying transient failures with backoff within the
+        total time budget.
+        
+        Returns:
+            (success, reachable) - reachable is False only when every attempt
+            failed with a network error or retriable status
+        """
+        deadline = time.monotonic() + self.total_budget_s
+        attempts = 0
         
-        for attempt in range(self.max_retries):
+        for attempt in range(max_attempts):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            attempts += 1
+            retry_after = 0.0
             try:
                 logger.info(
-                    f"Notifying evaluation server (attempt {attempt + 1}/{self.max_retries})..."
+                    "Notifying evaluation server (attempt %d/%d)...",
+                    attempt + 1, max_attempts
                 )
                 
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.post(
-                        evaluation_url,
-                        json=payload,
-                        headers={"Content-Type": "application/json"}
+                client = self._get_client()
+                # The httpx timeout applies per connect try and doesn't cover
+                # transport-level reconnects or the semaphore wait, so the
+                # whole attempt is bounded by the remaining budget
+                async with asyncio.timeout(remaining):
+                    async with self._sem:
+                        response = await client.post(
+                            url,
+                            content=body,
+                            headers={"Content-Type": "application/json"},
+                            timeout=min(remaining, 30.0)
+                        )
+                
+                if 200 <= response.status_code < 300:
+                    logger.info("✓ Evaluation server notified successfully")
+                    return True, True
+                
+                # Raw bytes avoid decoding the whole body just to log it
+                if logger.isEnabledFor(logging.WARNING):
+                    logger.warning(
+                        "Evaluation server returned %d: %r",
+                        response.status_code, response.content[:200]
+                    )
+                
+                if not (
+                    response.status_code in _RETRIABLE_CLIENT_ERRORS
+                    or 500 <= response.status_code < 600
+                ):
+                    logger.error(
+                        "Evaluation server rejected notification (%d); not retrying",
+                        response.status_code
                     )
+                    return False, True
+                
+                if response.status_code == 429:
+                    retry_after = self._retry_after(response)
                     
-                    if response.status_code == 200:
-                        logger.info("✓ Evaluation server notified successfully")
-                        return True
-                    else:
-                        logger.warning(
-                            f"Evaluation server returned {response.status_code}: "
-                            f"{response.text[:200]}"
-                        )
-                        
-            except Exception as e:
-                logger.error(f"Error notifying evaluation server: {e}")
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                # Other exceptions are bugs, not transient failures: let them raise
+                logger.error("Error notifying evaluation server: %s", e)
+            except TimeoutError:
+                logger.error(
+                    "Notification attempt ran out of the remaining budget (%gs)",
+                    remaining
+                )
             
-            # Retry with exponential backoff
-            if attempt < self.max_retries - 1:
-                delay = self.retry_delays[attempt]
-                logger.info(f"Retrying in {delay} seconds...")
-                time.sleep(delay)
+            # Retry with jittered exponential backoff
+            if attempt < max_attempts - 1:
+                delay = max(self._backoff_delay(attempt), retry_after)
+                if delay >= deadline - time.monotonic():
+                    logger.warning(
+                        "Retry budget of %gs exhausted", self.total_budget_s
+                    )
+                    break
+                logger.info("Retrying in %.2f seconds...", delay)
+                await asyncio.sleep(delay)
         
         logger.error(
-            f"Failed to notify evaluation server after {self.max_retries} attempts"
+            "Failed to notify evaluation server after %d attempts", attempts
         )
-        return False
\ No newline at end of file
+        return False, False
+
+
+class BatchingNotificationService(NotificationService):
+    """Coalesce notifications into batched POSTs to a batch endpoint.
+    
+    Notifications are queued and flushed as one ``{"notifications": [...]}``
+    POST once max_batch_size items are waiting or max_wait seconds have
+    passed since the first one. Use as an async context manager so the
+    background flusher is started and drained.
+    """
+    
+    def __init__(
+        self,
+        batch_url: str,
+        max_batch_size: int = 50,
+        max_wait: float = 0.1,
+        max_queue_size: int = 1000,
+        **kwargs
+    ):
+        """Initialize batching; remaining kwargs configure retries."""
+        super().__init__(**kwargs)
+        self.batch_url = batch_url
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._flusher: Optional[asyncio.Task] = None
+        self._closing = False
+    
+    async def __aenter__(self):
+        self._closing = False
+        self._flusher = asyncio.create_task(self._flush_loop())
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._flusher is not None:
+            # Refuse new items, then a sentinel tells the flusher to send what
+            # it has and stop
+            self._closing = True
+            await self._queue.put(None)
+            await self._flusher
+            self._flusher = None
+            
+            # Items that got in behind the sentinel (e.g. an enqueue that was
+            # blocked on a full queue) will never be sent
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not None and not item[1].done():
+                    item[1].set_exception(
+                        RuntimeError("BatchingNotificationService closed before sending")
+                    )
+        await super().__aexit__(exc_type, exc, tb)
+    
+    async def enqueue(self, notification: EvaluationNotification) -> asyncio.Future:
+        """
+        Queue a notification for the next batch.
+        
+        Returns:
+            Future resolving to True/False once its batch has been sent
+        
+        Raises:
+            RuntimeError: if the flusher isn't running (used outside
+                ``async with``, during or after exit), as the future would
+                never resolve
+        """
+        if self._closing or self._flusher is None or self._flusher.done():
+            raise RuntimeError("BatchingNotificationService is not running")
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((notification, future))
+        return future
+    
+    async def _flush_loop(self):
+        """Collect queued notifications into batches and send them."""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            
+            batch: List[Tuple[EvaluationNotification, asyncio.Future]] = [item]
+            deadline = loop.time() + self.max_wait
+            
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            await self._flush(batch)
+    
+    async def _flush(self, batch: List[Tuple[EvaluationNotification, asyncio.Future]]):
+        """Send one batch and resolve each caller's future."""
+        logger.info("Sending batch of %d notifications...", len(batch))
+        try:
+            body = orjson.dumps({"notifications": [n.model_dump() for n, _ in batch]})
+            success = await self._send(self.batch_url, body)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for _, future in batch:
+            if not future.done():
+                future.set_result(success)